@@ -18,18 +18,26 @@ __email__ = "cicagustiani@gmail.com"
 
 
 #standard libraries
-import pygraphviz as pgv
-import networkx as nx
 import os
 import re
+import sys
 
 from subprocess import run
 from multiprocessing import Pool, cpu_count
 from glob import glob
-from numpy import array_split
-from math import ceil, log10
+from math import ceil
 from itertools import combinations, groupby
-from more_itertools import consecutive_groups
+
+#additional library
+from gatetables import gate_tables
+
+# pygraphviz and networkx are imported where they are needed, loading them
+# takes most of the start-up time of short jobs
+
+# rough memory footprint of the objects, used by GraphQNet.estimate_nbytes
+_OBJ_NBYTES = 400     # GraphQNet instance and its attribute dict
+_GRAPH_NBYTES = 3000  # empty networkx.MultiGraph with its nodes
+_EDGE_NBYTES = 600    # one ordered edge of the MultiGraph
 
 
 
@@ -66,12 +74,12 @@ class GraphQNet:
         self.nqubit = nqubit
         self.netgates = netgates
         self.outdir = False
-        self.graph = False
+        self._graph = False
         self.depth = len(netgates)
 
-        #set some stuff
+        #set some stuff, the graph is built at its first use
         self.set_out_dir()
-        self.set_graph()
+        self.check_nqubit()
 
     def __copy__(self):
         return GraphQNet(self.nqubit, self.netgates)
@@ -102,23 +110,70 @@ class GraphQNet:
         """
         return [bitop.pos_of_ones(gate) for gate in netgates]
 
+    def edges(self):
+        """ Return the edges of the network, like net_to_edges but from the gate tables of nqubit
+        """
+        pair = gate_tables(self.nqubit).pair
+        return [pair.get(gate) or bitop.pos_of_ones(gate) for gate in self.netgates]
 
     def set_netgates(self, new_netgates):
         """ Renew the netgates attribute
         """
         self.netgates = new_netgates
         self.depth = len(new_netgates)
-        self.set_graph()
+        self.check_nqubit()
+        self._graph = False
+
+    def check_nqubit(self):
+        """ Raise ValueError if the network acts on more than nqubit qubits
+        """
+        nodes = set(p for e in self.edges() for p in e)
+        if len(nodes) > self.nqubit :
+            raise ValueError('Hi there, you need at least %i qubits'%len(nodes))
+
+    @property
+    def graph(self):
+        """ The networkx.MultiGraph of the network, built on demand
+        """
+        if self._graph is False :
+            self.set_graph()
+        return self._graph
+
+    def release_graph(self):
+        """ Drop the graph to save memory, it is rebuilt at its next use
+        """
+        if self._graph is not False :
+            # networkx graphs refer to themselves through their cached views, emptying
+            # the graph frees its edges at once instead of at the next garbage collection
+            self._graph.clear()
+        self._graph = False
+
+    @staticmethod
+    def estimate_nbytes(depth, graph=True):
+        """ Return the estimated memory in bytes of a GraphQNet object
+
+        :depth: int, the number of gates
+        :graph: boolean=True, whether the graph is built
+        """
+        nbytes = _OBJ_NBYTES + sys.getsizeof((0,)*depth)
+        if graph :
+            nbytes += _GRAPH_NBYTES + depth*_EDGE_NBYTES
+        return nbytes
+
+    def nbytes(self):
+        """ Return the estimated memory in bytes of the object
+        """
+        return self.estimate_nbytes(self.depth, self._graph is not False)
 
     def set_graph(self):
         """ Set self.graph
         """
-        wedges = [(*e, i) for i,e in enumerate(self.net_to_edges(self.netgates))]
-        self.graph = nx.MultiGraph()
-        self.graph.add_weighted_edges_from(wedges, weight='ordering')
-        if len(self.graph.nodes()) > self.nqubit :
-            raise ValueError('Hi there, you need at least %i qubits'%len(self.graph.nodes()))
-        self.graph.add_nodes_from(range(self.nqubit))
+        import networkx as nx
+
+        wedges = [(*e, i) for i,e in enumerate(self.edges())]
+        self._graph = nx.MultiGraph()
+        self._graph.add_weighted_edges_from(wedges, weight='ordering')
+        self._graph.add_nodes_from(range(self.nqubit))
 
 
     def set_out_dir(self, *outdir):
@@ -128,7 +183,8 @@ class GraphQNet:
         :outdir: str, the output directory
         """
         self.outdir = outdir[0] if outdir else os.getcwd()
-        run(['mkdir', '-p', self.outdir])
+        if outdir :
+            run(['mkdir', '-p', self.outdir])
 
 
     def more_three_con_edges(self):
@@ -139,16 +195,25 @@ class GraphQNet:
                 return True
         return False
 
-    def conjugation_by_swap(self):
-        """ Return a set of GraphQNet objects, the equivalent networks by swap conjugation, if there is any.
+    @staticmethod
+    def swap_conjugates(netgates, nqubit=False):
+        """ Return a set of gate networks, the equivalent networks of netgates by swap conjugation,
+        if there is any. Unlike conjugation_by_swap, it works on the bare tuples.
+
+        :netgates: tuple(int), the gate network
+        :nqubit: int, the number of qubits, by default the least that holds netgates
         """
+        #check_nqubit bounds the number of qubits, not their labels: the tables are widened
+        #to the largest label, a swap acts on the labels only
+        tab = gate_tables(max(nqubit or 0, max(netgates).bit_length()))
+
         #group the element by occurences, only the ones that
         #occur more than once, has potential to be a sanwdich
-        sw = [k for k,l in groupby(sorted(self.netgates)) if len(list(l))>1]
+        sw = [k for k,l in groupby(sorted(netgates)) if len(list(l))>1]
 
         #a list of contains network, and index where it starts
         sidx, i = [], 0
-        for k, l in groupby(self.netgates):
+        for k, l in groupby(netgates):
             if k in sw:
                 sidx += [(k, i)]
             i += len(list(l))
@@ -163,19 +228,24 @@ class GraphQNet:
         unet = []
         for k, sidx in sikey.items():
             idxs =[(a,b) for a,b in combinations(sidx,2) if (b-a)>1]
-            s1,s2 = bitop.pos_of_ones(k)
+            swap = tab.swap[tab.pair[k]]
             for i1, i2 in idxs :
                 #swap indices between i1 xxx i2, by sandwiching with swap k
-                new_net = list(self.netgates)
+                new_net = list(netgates)
                 for i in range(i1+1, i2):
-                    new_net[i] = bitop.swap(self.netgates[i],s1,s2)
+                    new_net[i] = swap[netgates[i]]
                 unet.append(tuple(new_net))
 
         unet = set(unet)
-        if self.netgates in unet :
-            unet.remove(self.netgates)
+        if netgates in unet :
+            unet.remove(netgates)
 
-        gqn_list = [GraphQNet(self.nqubit, net) for net in unet]
+        return unet
+
+    def conjugation_by_swap(self):
+        """ Return a set of GraphQNet objects, the equivalent networks by swap conjugation, if there is any.
+        """
+        gqn_list = [GraphQNet(self.nqubit, net) for net in self.swap_conjugates(self.netgates, self.nqubit)]
 
         return gqn_list
 
@@ -192,12 +262,14 @@ class GraphQNet:
         """
         :outfile:output file
         """
+        import pygraphviz as pgv
+
         gv = pgv.AGraph(directed=False, strict=False)
 
         for node in range(self.nqubit):
             gv.add_node(node, shape='circle')
-        for i,gate in enumerate(self.netgates) :
-            gv.add_edge(*bitop.pos_of_ones(gate), label=str(i))
+        for i,e in enumerate(self.edges()) :
+            gv.add_edge(*e, label=str(i))
         gv.layout()
         gv.draw('%s/%s'%(self.outdir, outfile))
 
@@ -212,7 +284,15 @@ class GraphQNet:
         Check if G_test is isomorphic to another GraphQNet instance.
         It includes bit-permutation and conjugation by swap in DS criteria
         """
-        return  nx.is_isomorphic(self.graph, GQN.graph, edge_match=self.__compare_edges)
+        from networkx.algorithms.isomorphism import GraphMatcher
+
+        # as networkx.is_isomorphic, but the matcher and its state refer to each other:
+        # the cycle is broken such that released graphs are freed at once, not by the gc
+        gm = GraphMatcher(self.graph, GQN.graph, edge_match=self.__compare_edges)
+        try :
+            return gm.is_isomorphic()
+        finally :
+            gm.state = None
 
     def is_isomorphic_uptolist(self, list_gqn):
         """
@@ -327,11 +407,7 @@ class bitop:
 
         :num: int, the number
         """
-        max_len = len(bin(num)) - 2   #string format 0bxxxx
-        lnum = [int(bool(num & (1<<n))) for n in range(max_len)] #turn into list
-        poss = [i for i,e in enumerate(lnum) if e==1] #extract positions
-
-        return tuple(poss)
+        return tuple(n for n in range(num.bit_length()) if num & (1<<n))
 
 
     @classmethod
@@ -359,6 +435,6 @@ class bitop:
         """
         res = 0
         for a in args :
-            res += 2**a
+            res += 1 << a
         return res
 
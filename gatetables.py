@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+__doc__=""" gatetables.py: precomputed lookup tables of the 2-bit gates for a fixed
+number of qubits, replacing the bit-operations of bitop in the inner loops.
+
+For nqubit qubits there are only C(nqubit,2) gates and C(nqubit,2) swaps, so
+every gate operation is a dictionary lookup. The tables are built once per nqubit
+and shared by the whole run; build them before starting a Pool, such that the
+forked workers inherit them instead of building their own.
+
+
+MAIN USAGE:
+
+    from gatetables import gate_tables
+
+    tab = gate_tables(nqubit)
+    tab.pair[6]             # (1, 2)
+    tab.swap[(0, 1)][5]     # 6, the gate after swapping qubits 0 and 1
+
+"""
+__author__ = "Cica Gustiani"
+__license__ = "GPL"
+__version__ = "1.0.0"
+__maintainer__ = "Cica Gustiani"
+__email__ = "cicagustiani@gmail.com"
+
+
+
+#standard libraries
+from functools import lru_cache
+from itertools import combinations
+
+
+
+@lru_cache(maxsize=None)
+def gate_tables(nqubit):
+    """ Return the GateTables of nqubit, built at the first call only
+
+    :nqubit: int, the number of qubits
+    """
+    return GateTables(nqubit)
+
+
+class GateTables:
+    """
+    Lookup tables of the 2-bit gates on nqubit qubits, the gates are in the
+    integer convention of bitop.pos_ones_toint
+    """
+    def __init__(self, nqubit):
+        """ Build the gate and swap tables
+
+        :nqubit: int, the number of qubits
+        """
+        self.nqubit = nqubit
+
+        #gate -> pair of qubits
+        self.pairs = tuple(combinations(range(nqubit), 2))
+        self.gates = tuple((1 << a) | (1 << b) for a, b in self.pairs)
+        self.pair = dict(zip(self.gates, self.pairs))
+
+        #swap[(s1,s2)][gate], the gate with the qubits s1 and s2 exchanged
+        self.swap = {}
+        for s1, s2 in self.pairs:
+            relabel = {s1: s2, s2: s1}
+            self.swap[(s1, s2)] = dict(
+                (gate, (1 << relabel.get(a, a)) | (1 << relabel.get(b, b)))
+                for gate, (a, b) in self.pair.items())
+
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+
+__doc__=""" netindex.py: membership and canonical-representative queries over
+the computed unique networks.
+
+A network is equivalent to a representative when it is isomorphic, by
+GraphQNet.is_isomorphic_to, to the representative or to one of its images by
+conjugation by swap and, optionally, time reversal; exactly the comparisons of the
+engine. When a representative is added, the keys of itself and of its images are
+registered. A query is then one isomorphism key and one dictionary lookup,
+independent of the number of stored networks.
+
+The isomorphism is the one of the engine that wrote the result files: a qubit
+relabelling that keeps, for every pair of qubits, the number of its gates and the
+position of its first gate only. E.g. (3,5,3,5) and (3,5,5,3) are isomorphic.
+
+MAIN USAGE:
+
+    from netindex import NetIndex
+
+    idx = NetIndex.from_files(['out/net-5Q-5E.json'], time_reversal=True)
+    idx.lookup(5, (9, 5, 3, 5, 6))   # (3, 5, 6, 5, 12), the representative, or None
+
+"""
+__author__ = "Cica Gustiani"
+__license__ = "GPL"
+__version__ = "1.0.0"
+__maintainer__ = "Cica Gustiani"
+__email__ = "cicagustiani@gmail.com"
+
+
+
+#standard libraries
+import json
+
+#additional library
+from GraphQNet import GraphQNet
+from gatetables import gate_tables
+
+
+
+def relabel_canonical(nqubit, netgates):
+    """ Return netgates with the qubits relabelled by order of first appearance; where the
+    two qubits of a gate appear together, the smallest of both choices is taken.
+    Two networks are equal up to qubit relabelling iff their results are equal.
+
+    :nqubit: int, the number of qubits
+    :netgates: tuple(int), the gate network
+    """
+    pair = gate_tables(nqubit).pair
+    #partial relabellings (labels, relabelled prefix), only the smallest prefixes are kept
+    states = [({}, ())]
+    for gate in netgates:
+        a, b = pair[gate]
+        nexts = []
+        for label, prefix in states:
+            if a in label and b in label :
+                nexts.append((label, prefix + ((1 << label[a]) | (1 << label[b]),)))
+                continue
+            #two new qubits can be labelled either way, later gates tell which one is smaller
+            orders = ((a, b), (b, a)) if a not in label and b not in label else ((a, b),)
+            for u, v in orders :
+                nlabel = dict(label)
+                for q in (u, v):
+                    if q not in nlabel :
+                        nlabel[q] = len(nlabel)
+                nexts.append((nlabel, prefix + ((1 << nlabel[a]) | (1 << nlabel[b]),)))
+        least = min(prefix for label, prefix in nexts)
+        states = [(label, prefix) for label, prefix in nexts if prefix == least]
+    return states[0][1]
+
+
+def first_gates(netgates):
+    """ Return the dictionaries (gate: position of its first occurrence) and (gate: its number
+    of occurrences), the first one is ordered by the first occurrences.
+
+    :netgates: tuple(int), the gate network
+    """
+    first, count = {}, {}
+    for i, gate in enumerate(netgates):
+        first.setdefault(gate, i)
+        count[gate] = count.get(gate, 0) + 1
+    return first, count
+
+
+def isomorphism_key(nqubit, netgates):
+    """ Return a key such that two networks are isomorphic by GraphQNet.is_isomorphic_to
+    iff their keys are equal. That isomorphism compares the first gate of every pair of
+    qubits and the number of gates of the pair, but not the positions of the repeated gates.
+
+    :nqubit: int, the number of qubits
+    :netgates: tuple(int), the gate network
+    """
+    first, count = first_gates(netgates)
+    return (tuple((first[gate], count[gate]) for gate in first),
+            relabel_canonical(nqubit, tuple(first)))
+
+
+def equivalent_keys(nqubit, netgates, conjugation_by_swap=True, time_reversal=False):
+    """ Return the isomorphism keys of the direct images of netgates, by swap conjugation and,
+    optionally, time reversal, as the engine compares them. The images are not walked further:
+    the isomorphism of the engine is loose on the repeated gates and not an equivalence
+    of circuits, chaining it with the images would merge networks the engine kept apart.
+
+    :nqubit: int, the number of qubits
+    :netgates: tuple(int), the gate network
+    :conjugation_by_swap: boolean=True, consider equivalence by swap conjugation
+    :time_reversal: boolean=False, consider equivalence by time reversal
+    """
+    images = []
+    if conjugation_by_swap :
+        images.extend(GraphQNet.swap_conjugates(netgates, nqubit))
+    if time_reversal :
+        images.append(netgates[::-1])
+    return set(isomorphism_key(nqubit, net) for net in images)
+
+
+
+class NetIndex:
+    """
+    Lookup index from isomorphism keys to representative networks
+    """
+    def __init__(self, conjugation_by_swap=True, time_reversal=False):
+        """ Instantiation of an empty index.
+
+        :conjugation_by_swap: boolean=True, networks equivalent by swap conjugation share a representative
+        :time_reversal: boolean=False, networks equivalent by time reversal share a representative
+        """
+        self.conjugation_by_swap = conjugation_by_swap
+        self.time_reversal = time_reversal
+        self.representatives = []
+        self.stored = {}    # representative -> its position
+        self.table = {}     # (nqubit, isomorphism key) -> position of its representative
+        self.own = set()    # keys of the representatives themselves, they take precedence over images
+
+    def __len__(self):
+        return len(self.representatives)
+
+    def add(self, nqubit, netgates):
+        """ Register netgates as a representative: its own key and the keys of its images by
+        the criteria. A stored network is always its own representative, an image key already
+        registered keeps its former representative.
+        Return the representative of netgates.
+
+        :nqubit: int, the number of qubits
+        :netgates: tuple(int), the gate network
+        """
+        netgates = tuple(netgates)
+        if netgates in self.stored :
+            return netgates
+        i = len(self.representatives)
+        self.representatives.append(netgates)
+        self.stored[netgates] = i
+
+        key = (nqubit, isomorphism_key(nqubit, netgates))
+        if key not in self.table or key not in self.own :
+            self.table[key] = i
+            self.own.add(key)
+        for ekey in equivalent_keys(nqubit, netgates, self.conjugation_by_swap, self.time_reversal):
+            self.table.setdefault((nqubit, ekey), i)
+        return netgates
+
+    def lookup(self, nqubit, netgates):
+        """ Return the representative equivalent to netgates, or None if
+        no stored network is equivalent.
+
+        :nqubit: int, the number of qubits
+        :netgates: tuple(int), the gate network
+        """
+        netgates = tuple(netgates)
+        i = self.stored.get(netgates)
+        if i is None :
+            i = self.table.get((nqubit, isomorphism_key(nqubit, netgates)))
+        return None if i is None else self.representatives[i]
+
+    def add_file(self, path):
+        """ Register all networks of a result file, e.g. 'out/net-5Q-5E.json'
+
+        :path: str, the result file
+        """
+        with open(path) as inff :
+            res = json.load(inff)
+        for net in res['networks']:
+            self.add(res['nqubit'], tuple(net))
+
+    @classmethod
+    def from_files(cls, paths, conjugation_by_swap=True, time_reversal=False):
+        """ Return an index built from result files
+
+        :paths: list(str), the result files
+        :conjugation_by_swap: boolean=True, consider equivalence by swap conjugation
+        :time_reversal: boolean=False, consider equivalence by time reversal
+        """
+        idx = cls(conjugation_by_swap, time_reversal)
+        for path in paths :
+            idx.add_file(path)
+        return idx
+
+    def save(self, path):
+        """ Store the index as a json file, such that it is built only once.
+
+        :path: str, the output file
+        """
+        res = {'conjugation_by_swap': self.conjugation_by_swap,
+               'time_reversal': self.time_reversal,
+               'representatives': self.representatives,
+               'entries': [[nqubit, sig, cnet, i, key in self.own]
+                           for key, i in self.table.items() for nqubit, (sig, cnet) in [key]]
+               }
+        with open(path, 'w+') as outf :
+            json.dump(res, outf)
+
+    @classmethod
+    def load(cls, path):
+        """ Return the index stored by save
+
+        :path: str, the index file
+        """
+        with open(path) as inff :
+            res = json.load(inff)
+        idx = cls(res['conjugation_by_swap'], res['time_reversal'])
+        idx.representatives = [tuple(rep) for rep in res['representatives']]
+        idx.stored = dict((rep, i) for i, rep in enumerate(idx.representatives))
+        for nqubit, sig, cnet, i, own in res['entries']:
+            key = (nqubit, (tuple(map(tuple, sig)), tuple(cnet)))
+            idx.table[key] = i
+            if own :
+                idx.own.add(key)
+        return idx
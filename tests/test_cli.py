@@ -0,0 +1,56 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def cli(*args):
+    proc = subprocess.run([sys.executable, '-m', 'unique2net', *args], cwd=REPO,
+                          capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+    return proc.stdout
+
+
+def networks(path):
+    with open(path) as inff :
+        return [tuple(net) for net in json.load(inff)['networks']]
+
+
+def test_import_loads_no_graph_library():
+    code = 'import sys, unique2net; print(sorted({"networkx", "pygraphviz"} & set(sys.modules)))'
+    proc = subprocess.run([sys.executable, '-c', code], cwd=REPO, capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.strip() == '[]'
+
+
+def test_enumerate_then_resume(tmp_path):
+    pytest.importorskip('networkx')
+    outdir = str(tmp_path)
+    out = cli('enumerate', '4', '4', '--outpath', outdir, '--ncpu', '2', '--no-time-reversal')
+    assert out.startswith('55 unique networks')
+    assert networks(outdir+'/net-4Q-4E.json') == networks(REPO+'/out/nonisonet-4Q-4E.json')
+
+    out = cli('resume', outdir+'/net-4Q-4E.json', '5', '--outpath', outdir, '--ncpu', '2')
+    assert out.startswith('151 unique networks')
+    assert networks(outdir+'/net-4Q-5E.json') == networks(REPO+'/out/net-4Q-5E.json')
+    assert networks(outdir+'/nonisonet-4Q-5E.json') == networks(REPO+'/out/nonisonet-4Q-5E.json')
+
+    out = cli('resume', outdir+'/net-4Q-5E.json', '5', '--outpath', outdir)
+    assert out.strip() == 'nothing to do here'
+
+
+def test_count_and_inspect():
+    out = cli('count', 'out/net-4Q-5E.json', 'out/nonisonet-4Q-5E.json')
+    assert out.splitlines() == ['out/net-4Q-5E.json: 151', 'out/nonisonet-4Q-5E.json: 256']
+
+    out = cli('inspect', 'out/net-3Q-2E.json', '--networks').splitlines()
+    with open(REPO+'/out/net-3Q-2E.json') as inff :
+        res = json.load(inff)
+    assert 'nqubit: 3' in out and 'depth: 2' in out
+    assert 'time_reversal: %s'%res['time_reversal'] in out
+    assert out[-3:] == ['networks: 2'] + [str(tuple(net)) for net in res['networks']]
@@ -0,0 +1,28 @@
+from itertools import combinations
+
+import pytest
+
+from GraphQNet import GraphQNet, bitop
+from gatetables import gate_tables
+
+
+@pytest.mark.parametrize('nqubit', range(2, 7))
+def test_tables_match_bitop(nqubit):
+    tab = gate_tables(nqubit)
+    gates = [bitop.pos_ones_toint(a, b) for a, b in combinations(range(nqubit), 2)]
+    assert sorted(tab.gates) == sorted(gates)
+    assert dict((gate, bitop.pos_of_ones(gate)) for gate in gates) == tab.pair
+    for s1, s2 in combinations(range(nqubit), 2):
+        assert tab.swap[(s1, s2)] == dict((gate, bitop.swap(gate, s1, s2)) for gate in gates)
+
+
+def test_swap_conjugates_beyond_nqubit():
+    #three qubits labelled 0, 1 and 4, nqubit bounds their number only
+    net = (3, 17, 18, 3, 17, 3)
+    GraphQNet(3, net)
+    relabel = {3: 3, 5: 17, 6: 18}
+    back = dict((v, k) for k, v in relabel.items())
+    conjugates = GraphQNet.swap_conjugates(tuple(back[g] for g in net), 3)
+    expected = set(tuple(relabel[g] for g in conj) for conj in conjugates)
+    assert expected
+    assert GraphQNet.swap_conjugates(net, 3) == expected
@@ -0,0 +1,73 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip('networkx')
+
+import unique2net as u2n
+from GraphQNet import GraphQNet
+from gatetables import gate_tables
+
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def networks(path):
+    with open(path) as inff :
+        return [tuple(net) for net in json.load(inff)['networks']]
+
+
+@pytest.mark.parametrize('max_memory', [False, '6M', '200K', 40000, '1K'])
+@pytest.mark.parametrize('nqubit', [4, 5])
+def test_budget_keeps_results(tmp_path, capsys, nqubit, max_memory):
+    outdir = str(tmp_path)
+    res = u2n.unique2net(nqubit, 5, draw_graphs=False, outpath=outdir, ncpu=2, max_memory=max_memory)
+    out = capsys.readouterr().out
+
+    assert [gqn.netgates for gqn in res] == networks('%s/out/net-%iQ-5E.json'%(REPO, nqubit))
+    #the spilled level and its shards are removed
+    assert sorted(os.listdir(outdir)) == ['net-%iQ-5E.json'%nqubit] + ['nonisonet-%iQ-%iE.json'%(nqubit, e) for e in range(2, 6)]
+    if not max_memory :
+        assert 'memory budget' not in out
+    if max_memory == 40000 :
+        #every strategy is taken
+        assert 'workers at depth' in out
+        assert 'kept without graphs' in out
+        assert 'spilled to disk' in out
+
+
+@pytest.mark.parametrize('block', [1, 2, 3, 7, 1000])
+def test_eliminate_on_disk_matches_eliminate_by_idx(tmp_path, block):
+    nqubit = 4
+    parents = [GraphQNet(nqubit, net) for net in networks(REPO+'/out/nonisonet-4Q-3E.json')]
+    children = u2n.iterate_graphqnet_noniso(nqubit, parents, list(gate_tables(nqubit).gates))
+    nets = [gqn.netgates for gqn in children]
+
+    paths = []
+    for i, start in enumerate(range(0, len(nets), 17)):
+        paths.append(str(tmp_path/('part%i.json'%i)))
+        with open(paths[-1], 'w') as outf :
+            json.dump({'networks': nets[start:start+17]}, outf)
+
+    elim = u2n.eliminate_on_disk(nqubit, paths, GraphQNet.conjugation_by_swap, block)
+    kept = u2n.eliminate_by_idx(children, getattr(u2n, '__helper_idx_conjugation_by_swap'), 1)
+    assert elim
+    assert [net for i, net in enumerate(nets) if i not in elim] == [gqn.netgates for gqn in kept]
+
+
+@pytest.mark.parametrize('max_memory, nbytes', [
+    ('4G', 4*1024**3),
+    ('512MiB', 512*1024**2),
+    ('1.5k', 1536),
+    (40000, 40000),
+    (False, False),
+])
+def test_parse_memory(max_memory, nbytes):
+    assert u2n.parse_memory(max_memory) == nbytes
+
+
+@pytest.mark.parametrize('max_memory', ['4X', 'lots', '-1G', '4 G B extra'])
+def test_parse_memory_rejects_bad_input(max_memory):
+    with pytest.raises(ValueError):
+        u2n.parse_memory(max_memory)
@@ -0,0 +1,59 @@
+import json
+import os
+import random
+from glob import glob
+from itertools import permutations
+
+import pytest
+
+from gatetables import gate_tables
+from netindex import NetIndex, relabel_canonical
+
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS = sorted(glob(REPO+'/out/net*-*Q-*E.json'))
+
+
+def load(path):
+    with open(path) as inff :
+        res = json.load(inff)
+    return res['nqubit'], [tuple(net) for net in res['networks']]
+
+
+@pytest.mark.parametrize('path', RESULTS, ids=os.path.basename)
+def test_stored_networks_are_their_own_representative(path):
+    nqubit, nets = load(path)
+    #the final results are reduced by time reversal, the levels are not
+    idx = NetIndex.from_files([path], time_reversal=os.path.basename(path).startswith('net-'))
+    assert len(idx) == len(nets)
+    assert [idx.lookup(nqubit, net) for net in nets] == nets
+
+
+def test_lookup_relabelled_and_unknown():
+    idx = NetIndex.from_files([REPO+'/out/net-5Q-5E.json'], time_reversal=True)
+    assert idx.lookup(5, (9, 5, 3, 5, 6)) == (3, 5, 6, 5, 12)
+    assert idx.lookup(5, (3, 5, 3, 6, 9)) is None
+
+
+def test_save_load_round_trip(tmp_path):
+    nqubit, nets = load(REPO+'/out/nonisonet-4Q-5E.json')
+    idx = NetIndex.from_files([REPO+'/out/nonisonet-4Q-5E.json'])
+    idx.save(str(tmp_path/'index.json'))
+    loaded = NetIndex.load(str(tmp_path/'index.json'))
+
+    assert (loaded.conjugation_by_swap, loaded.time_reversal) == (True, False)
+    assert loaded.representatives == idx.representatives
+    assert loaded.table == idx.table
+    assert loaded.own == idx.own
+    assert [loaded.lookup(nqubit, net) for net in nets] == nets
+
+
+def test_relabel_canonical_is_least_relabelling():
+    rng = random.Random(0)
+    for nqubit in range(2, 7):
+        tab = gate_tables(nqubit)
+        for _ in range(100):
+            net = tuple(rng.choice(tab.gates) for _ in range(rng.randint(1, 7)))
+            least = min(tuple((1 << perm[a]) | (1 << perm[b]) for a, b in map(tab.pair.get, net))
+                        for perm in permutations(range(nqubit)))
+            assert relabel_canonical(nqubit, net) == least
@@ -0,0 +1,50 @@
+import json
+import os
+import subprocess
+import sys
+from glob import glob
+
+import pytest
+
+pytest.importorskip('networkx')
+
+from unique2net import graphqnet_noniso
+
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def cli(*args):
+    return subprocess.Popen([sys.executable, '-m', 'unique2net', *args], cwd=REPO)
+
+
+def networks(path):
+    with open(path) as inff :
+        return [tuple(net) for net in json.load(inff)['networks']]
+
+
+def test_shards_as_processes_match_serial(tmp_path):
+    outdir = str(tmp_path/'shards')
+    assert cli('seed', '4', '--outpath', outdir).wait() == 0
+    with open(outdir+'/nonisonet-4Q-1E.json') as inff :
+        seed = json.load(inff)
+    #the seed applies no criteria, merge records the ones it applies
+    assert seed['networks'] == [[3]]
+    assert 'conjugation_by_swap' not in seed and 'time_reversal' not in seed
+
+    for nedge in range(1, 5):
+        level = '%s/nonisonet-4Q-%iE.json'%(outdir, nedge)
+        shards = [cli('shard', level, str(i), '3', '--outpath', outdir) for i in range(3)]
+        assert [p.wait() for p in shards] == [0, 0, 0]
+        final = ['--time-reversal'] if nedge == 4 else []
+        assert cli('merge', level, '3', '--outpath', outdir, '--ncpu', '2', *final).wait() == 0
+
+    assert glob(outdir+'/*shard*') == []
+
+    serial_dir = str(tmp_path/'serial')
+    serial = [gqn.netgates for gqn in graphqnet_noniso(4, 5, outdir=serial_dir, ncpu=2, time_reversal=True)]
+    sharded = networks(outdir+'/net-4Q-5E.json')
+    assert sharded == serial
+    assert sharded == networks(REPO+'/out/net-4Q-5E.json')
+    assert networks(outdir+'/nonisonet-4Q-5E.json') == networks(REPO+'/out/nonisonet-4Q-5E.json')
+
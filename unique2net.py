@@ -15,6 +15,10 @@ MAIN USAGE:
 
     unique2net(nqubit, network_length)
 
+or from the command line, see `python -m unique2net --help`
+
+    python -m unique2net enumerate nqubit network_length
+
 """
 __author__ = "Cica Gustiani"
 __license__ = "GPL"
@@ -25,20 +29,116 @@ __email__ = "cicagustiani@gmail.com"
 
 
 #standard libraries
-from itertools import combinations
+from argparse import ArgumentParser
+from itertools import islice
+from math import ceil
 from time import time
 from subprocess import run
 from multiprocessing import cpu_count, Pool
+from resource import getrusage, RUSAGE_SELF
 import json
 import os
+import re
+import sys
 
 #additional library
 from GraphQNet import GraphQNet, bitop
+from gatetables import gate_tables
 
 
 
+def parse_memory(max_memory):
+    """ Return max_memory in bytes, or False if there is no limit
 
-def iterate_graphqnet_noniso(nqubit, graphqnet_list, net_edges):
+    :max_memory: int, bytes, or str with a unit K, M, G or T, e.g. '512M', '4G'
+    """
+    if not max_memory :
+        return False
+    if type(max_memory) == int :
+        return max_memory
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*', str(max_memory), re.IGNORECASE)
+    if not match :
+        raise ValueError('max_memory requires bytes or a size like 512M, 4G; got %s'%max_memory)
+    power = ' KMGT'.index(match.group(2).upper() or ' ')
+    return int(float(match.group(1)) * 1024**power)
+
+
+class MemoryBudget:
+    """
+    The memory budget of a run. It tracks the estimated memory of the level and
+    deduplication structures, checks the estimates against the measured memory of the
+    process, and tells when cheaper strategies are needed.
+    """
+    def __init__(self, max_memory=False):
+        """
+        :max_memory: int or str=False, the budget, see parse_memory. False means no limit
+        """
+        self.limit = parse_memory(max_memory)
+        self.usage = {}
+        self.peak_tracked = 0
+        self.scale = 1
+        if self.limit :
+            #the engine needs networkx anyway, its import is not charged to the budget
+            import networkx
+        self.rss0 = self.rss()
+
+    @staticmethod
+    def rss():
+        """ Return the peak resident set size of the process in bytes
+        """
+        maxrss = getrusage(RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == 'darwin' else maxrss*1024
+
+    def track(self, name, nbytes):
+        """ Set the estimated memory of a structure
+
+        :name: str, the structure, e.g. 'level' or 'dedup'
+        :nbytes: int, its memory in bytes
+        """
+        self.usage[name] = nbytes
+        self.peak_tracked = max(self.peak_tracked, self.tracked())
+
+    def tracked(self):
+        return sum(self.usage.values())
+
+    def measured(self):
+        """ Return the growth of the peak resident set size since the budget started
+        """
+        return max(0, self.rss() - self.rss0)
+
+    def calibrate(self):
+        """ Check the estimates against the measured memory. When the peak of the estimates
+        falls short of the measured peak, the later estimates are scaled up. Return the scale.
+        Small measures are dominated by the fixed overhead of the process, they are ignored.
+        """
+        if self.limit and self.peak_tracked and self.measured() >= self.limit/16 :
+            self.scale = max(self.scale, self.measured()/self.peak_tracked)
+        return self.scale
+
+    def used(self):
+        """ Return the memory in use, the scaled estimates or the measured peak if larger
+        """
+        return max(self.tracked()*self.scale, self.measured())
+
+    def near(self, nbytes=0):
+        """ Tells if allocating the estimated nbytes more reaches 3/4 of the budget
+        """
+        return bool(self.limit) and self.used() + nbytes*self.scale >= 0.75*self.limit
+
+    def workers(self, ncpu, nbytes):
+        """ Return the number of workers, at most ncpu, such that every worker can hold nbytes
+
+        :ncpu: int, the requested cpu number
+        :nbytes: int, the estimated memory of a worker
+        """
+        if not self.limit :
+            return ncpu
+        return max(1, min(ncpu, int((self.limit - self.used())//max(nbytes*self.scale, 1))))
+
+
+
+
+def iterate_graphqnet_noniso(nqubit, graphqnet_list, net_edges, compact=False):
     """
     Produce non-isomorphic graph up to edges ordering form graphqnet_list.
     It applies criteria: bit-permutation and cojugation by swap
@@ -46,6 +146,7 @@ def iterate_graphqnet_noniso(nqubit, graphqnet_list, net_edges):
     :nqubit: int, the number of qubits
     :graphqnet_list:list(GraphQNet), list of the GraphQNet objects.
     :net_edges:list(int), list of all possible edges in network (integer) format
+    :compact: boolean=False, release the graphs of the results to save memory
     """
 
     #for each net, spawn new unique net with one more edge
@@ -57,49 +158,158 @@ def iterate_graphqnet_noniso(nqubit, graphqnet_list, net_edges):
             if not gqn_cand.more_three_con_edges():
                 if not gqn_cand.is_isomorphic_uptolist(unique_net):
                     unique_net.append(gqn_cand)
+        if compact :
+            for gqn_cand in unique_net:
+                gqn_cand.release_graph()
         unique_net_all.extend(unique_net)
 
     return unique_net_all
 
 
 
-def __helper_idx_conjugation_by_swap(args):
-    return __idx_conjugation_by_swap(*args)
+# the list checked by the workers, it is passed once per worker by _init_gqn_list.
+# With _compact, a graph is built for one check only and is not kept.
+_gqn_list, _compact = [], False
+
+def _init_gqn_list(gqn_list, compact=False):
+    global _gqn_list, _compact
+    _gqn_list, _compact = gqn_list, compact
+
+
+def _later_isomorphic(gqn_list, start, equiv_gqn, compact=False):
+    """
+    Tells if a network of gqn_list, from index start on, is isomorphic to one of equiv_gqn
+    :gqn_list: the whole GraphQNet list
+    :start: the first index to be checked
+    :equiv_gqn: list(GraphQNet), the equivalent networks
+    :compact: release the graph of every checked network right after its check
+    """
+    found = False
+    for i in range(start, len(gqn_list)):
+        gqn2 = gqn_list[i]
+        found = gqn2.is_isomorphic_uptolist(equiv_gqn)
+        if compact :
+            gqn2.release_graph()
+        if found :
+            break
+    if compact :
+        for gqn in equiv_gqn:
+            gqn.release_graph()
+    return found
+
+
+def __helper_idx_conjugation_by_swap(idx):
+    return __idx_conjugation_by_swap(_gqn_list, idx, _compact)
 
 
-def __idx_conjugation_by_swap(gqn_list, idx):
+def __idx_conjugation_by_swap(gqn_list, idx, compact=False):
     """
     return the index when it is equivalent by swap conjugation
     :gqn_list: the whole GraphQNet list
     :idx: the index to be checked
+    :compact: do not keep the graphs of gqn_list
     """
     equiv_gqn = gqn_list[idx].conjugation_by_swap()
-    for gqn2 in gqn_list[idx+1:]:
-        if gqn2.is_isomorphic_uptolist(equiv_gqn):
-            return idx
-    return False
+    return idx if _later_isomorphic(gqn_list, idx+1, equiv_gqn, compact) else False
 
 
-def __helper_idx_time_reversal(args):
-    return __idx_time_reversal(*args)
+def __helper_idx_time_reversal(idx):
+    return __idx_time_reversal(_gqn_list, idx, _compact)
 
 
-def __idx_time_reversal(gqn_list, idx):
+def __idx_time_reversal(gqn_list, idx, compact=False):
     """
-    return the index when it is equivalent by swap conjugation
+    return the index when it is equivalent by time reversal
     :gqn_list: the whole GraphQNet list
     :idx: the index to be checked
+    :compact: do not keep the graphs of gqn_list
     """
-    equiv_gqn = gqn_list[idx].time_reversal()
-    for gqn2 in gqn_list[idx+1:]:
-        if gqn2.is_isomorphic_to(equiv_gqn):
-            return idx
-    return False
+    equiv_gqn = [gqn_list[idx].time_reversal()]
+    return idx if _later_isomorphic(gqn_list, idx+1, equiv_gqn, compact) else False
 
 
+def eliminate_by_idx(gqn_list, helper, ncpu, compact=False):
+    """
+    Return gqn_list without the networks that helper marks as equivalent to a later one
 
+    :gqn_list: the whole GraphQNet list
+    :helper: __helper_idx_conjugation_by_swap or __helper_idx_time_reversal
+    :ncpu: int, the cpu number for parallelization. Every worker holds a copy of gqn_list
+    :compact: boolean=False, build the graphs for one check at a time instead of keeping them
+    """
+    lenl = len(gqn_list)
+    if ncpu > 1 :
+        P = Pool(ncpu, initializer=_init_gqn_list, initargs=(gqn_list, compact))
+        to_elim = P.map(helper, range(lenl))
+        P.close()
+        P.join()
+    else :
+        #serial, without a copy of the list
+        _init_gqn_list(gqn_list, compact)
+        to_elim = list(map(helper, range(lenl)))
+        _init_gqn_list([])
 
-def graphqnet_noniso(nqubit, net_depth, outdir=False, start_gqns=False, draw_graphs=False, ncpu=False, conjugation_by_swap=True, time_reversal=False):
+    for i in filter(lambda x: x, to_elim) :
+        gqn_list[i] = False
+    return [gq for gq in gqn_list if gq]
+
+
+def read_networks(paths):
+    """
+    Yield the networks stored in the result files, holding one file in memory at a time
+
+    :paths: list(str), the result files
+    """
+    for path in paths :
+        with open(path) as inff :
+            nets = json.load(inff)['networks']
+        for net in nets :
+            yield tuple(net)
+
+
+def eliminate_on_disk(nqubit, paths, equivalents, block):
+    """
+    Return the set of indices of the networks stored in paths that are equivalent to a later one,
+    as eliminate_by_idx does, without loading the whole list. The networks are checked by blocks:
+    only a block with its equivalent networks and one file are held, and the files are read
+    once per block.
+
+    :nqubit: int, the number of qubits
+    :paths: list(str), the result files, e.g. the shard outputs in order
+    :equivalents: function(GraphQNet) -> list(GraphQNet), e.g. GraphQNet.conjugation_by_swap
+    :block: int, the number of networks in a block
+    """
+    elim, start = set(), 0
+    while True :
+        nets = list(islice(read_networks(paths), start, start+block))
+        if not nets :
+            break
+        equiv = dict((start+i, equivalents(GraphQNet(nqubit, net))) for i, net in enumerate(nets))
+        nets = None
+
+        for j, net in enumerate(islice(read_networks(paths), start+1, None), start+1):
+            if not equiv :
+                break
+            gqn2 = GraphQNet(nqubit, net)
+            for idx in [idx for idx in equiv if idx < j]:
+                if gqn2.is_isomorphic_uptolist(equiv[idx]):
+                    elim.add(idx)
+                    for gqn in equiv.pop(idx):
+                        gqn.release_graph()
+            gqn2.release_graph()
+        for equiv_gqn in equiv.values():
+            for gqn in equiv_gqn:
+                gqn.release_graph()
+        start += block
+
+    #as in eliminate_by_idx, which filters out the index 0, the first network is kept
+    elim.discard(0)
+    return elim
+
+
+
+
+def graphqnet_noniso(nqubit, net_depth, outdir=False, start_gqns=False, draw_graphs=False, ncpu=False, conjugation_by_swap=True, time_reversal=False, max_memory=False):
     """ List uninque non-isomorphic graph by iterating it
 
     :nqubit: int, the number of qubits
@@ -112,18 +322,24 @@ def graphqnet_noniso(nqubit, net_depth, outdir=False, start_gqns=False, draw_gra
     :ncpu:int=cpu_count(),the cpu number for parallelization
     :conjugation_by_swap: boolean=True, consider elimination by swap conjugation
     :time_reversal: boolean=True, consider elimination by time reversal
+    :max_memory: int or str=False, the memory budget, e.g. '4G'. When a level gets near
+                 the budget, the cheaper strategies are taken, in order:
+                 fewer workers, networks without their graphs, the level spilled to disk in shards.
     """
     # setup directories, files, and initial variables
     outdir = outdir if outdir else 'out'
     run(['mkdir','-p',outdir])
+    budget = MemoryBudget(max_memory)
 
     if start_gqns :
         nedge, gqn_list = start_gqns[0].depth, start_gqns
     else :
         nedge, gqn_list = 1, [GraphQNet(nqubit, (bitop.pos_ones_toint(0,1),))]
 
-    net_edges = [bitop.pos_ones_toint(*e) for e in combinations(range(nqubit),2)]
+    #the tables are built here, before the pools, to be shared by the workers
+    net_edges = list(gate_tables(nqubit).gates)
     ncpu = ncpu if ncpu else cpu_count()
+    compact = False
     # iteration part
     while nedge < net_depth:
         start_time = time()
@@ -142,32 +358,83 @@ def graphqnet_noniso(nqubit, net_depth, outdir=False, start_gqns=False, draw_gra
         except FileNotFoundError:
             #do everything 
 
-            gqn_list = iterate_graphqnet_noniso(nqubit, gqn_list, net_edges)
-            nedge += 1
-
-            #eliminate the conjugation by swaps
-            if conjugation_by_swap:
-                lenl = len(gqn_list)
-                P = Pool(ncpu)
-                to_elim = P.map(__helper_idx_conjugation_by_swap, zip([gqn_list]*lenl, range(lenl)))
-                P.close()
-                P.join()
-
-                for i in filter(lambda x: x, to_elim) :
-                    gqn_list[i] = False
-                gqn_list = [gq for gq in gqn_list if gq]
-
-            # storing results
-            res = {'nqubit':nqubit,
-                   'depth':nedge,
-                   'time': time()-start_time,
-                   'conjugation_by_swap': conjugation_by_swap,
-                   'time_reversal': False,
-                   'start_gate': start_gqns[0].depth  if start_gqns else 1,
-                   'networks':[gqn.netgates for gqn in gqn_list]
-                   }
-            with open(res_path, 'w+') as outf :
-                json.dump(res, outf)
+            #the memory strategy, from the upper bound of the next level size
+            nchild = len(gqn_list)*len(net_edges)
+            budget.track('level', sum(gqn.nbytes() for gqn in gqn_list))
+            compact = compact or budget.near(nchild*GraphQNet.estimate_nbytes(nedge+1))
+            spill = budget.near(nchild*GraphQNet.estimate_nbytes(nedge+1, graph=False))
+            #the dedup structures: the equivalent networks of one index, with their graphs,
+            #and for every worker of a pool a copy of the level
+            conj_nbytes = (nedge+1)*GraphQNet.estimate_nbytes(nedge+1)
+            copy_nbytes = nchild*GraphQNet.estimate_nbytes(nedge+1, graph=not compact)
+            nworker = budget.workers(ncpu, copy_nbytes + conj_nbytes)
+            if nworker < ncpu :
+                print('memory budget: %i workers at depth %i'%(nworker, nedge+1))
+
+            if spill :
+                print('memory budget: level of depth %i is spilled to disk'%(nedge+1))
+                nshard = max(2, ceil(4*nchild*GraphQNet.estimate_nbytes(nedge+1, graph=False)/budget.limit))
+                #the level is spilled already split, such that a shard reads its slice only
+                part_paths = []
+                for i in range(nshard):
+                    start, stop = shard_bounds(len(gqn_list), i, nshard)
+                    part_paths.append('%s/spill-%iQ-%iE-part%iof%i.json'%(outdir,nqubit,nedge,i,nshard))
+                    with open(part_paths[-1], 'w+') as outf :
+                        json.dump({'nqubit':nqubit,
+                                   'depth':nedge,
+                                   'start_gate': start_gqns[0].depth  if start_gqns else 1,
+                                   'shard': i,
+                                   'nshard': nshard,
+                                   'networks':[gqn.netgates for gqn in islice(gqn_list, start, stop)]}, outf)
+                gqn_list = None
+                budget.track('level', 0)
+
+                for i, part_path in enumerate(part_paths):
+                    shard_level(part_path, i, nshard, outdir=outdir, compact=True)
+
+                #the elimination reads the shards by blocks that fit the budget
+                free = max(budget.limit - budget.used(), 0)
+                block = max(1, int(free//(4*conj_nbytes*budget.scale)))
+                budget.track('dedup', block*conj_nbytes)
+                gqn_list = merge_shards(part_paths[0], nshard, outdir=outdir, ncpu=nworker,
+                                        conjugation_by_swap=conjugation_by_swap, block=block)
+                for part_path in part_paths :
+                    os.remove(part_path)
+                nedge += 1
+
+            else :
+                if compact :
+                    print('memory budget: networks of depth %i are kept without graphs'%(nedge+1))
+                    for gqn in gqn_list:
+                        gqn.release_graph()
+                gqn_list = iterate_graphqnet_noniso(nqubit, gqn_list, net_edges, compact=compact)
+                nedge += 1
+                budget.track('level', sum(gqn.nbytes() for gqn in gqn_list))
+
+                #eliminate the conjugation by swaps
+                if conjugation_by_swap:
+                    budget.track('dedup', nworker*copy_nbytes + conj_nbytes if nworker > 1 else conj_nbytes)
+                    gqn_list = eliminate_by_idx(gqn_list, __helper_idx_conjugation_by_swap, nworker, compact=compact)
+
+                # storing results
+                res = {'nqubit':nqubit,
+                       'depth':nedge,
+                       'time': time()-start_time,
+                       'conjugation_by_swap': conjugation_by_swap,
+                       'time_reversal': False,
+                       'start_gate': start_gqns[0].depth  if start_gqns else 1,
+                       'networks':[gqn.netgates for gqn in gqn_list]
+                       }
+                with open(res_path, 'w+') as outf :
+                    json.dump(res, outf)
+                res = None
+
+            if compact :
+                for gqn in gqn_list:
+                    gqn.release_graph()
+            budget.track('level', sum(gqn.nbytes() for gqn in gqn_list))
+            budget.track('dedup', 0)
+            budget.calibrate()
 
         if draw_graphs :
             draw_path = '%s/nonisonet-%iQ-%iE.png'%(outdir,nqubit,nedge)
@@ -175,7 +442,7 @@ def graphqnet_noniso(nqubit, net_depth, outdir=False, start_gqns=False, draw_gra
                 print("No figure generated, it has already done")
             else : 
                 if len(gqn_list) > 0 :
-                    GraphQNet.draw_netgraphs_list(res['networks'], nqubit, outfile=draw_path)
+                    GraphQNet.draw_netgraphs_list([gqn.netgates for gqn in gqn_list], nqubit, outfile=draw_path)
                 else : print("empty result, no image is produced")
 
 
@@ -185,14 +452,12 @@ def graphqnet_noniso(nqubit, net_depth, outdir=False, start_gqns=False, draw_gra
 
     #eliminate the time reversal
     if time_reversal:
-        lenl = len(gqn_list)
-        P = Pool(ncpu)
-        to_elim = P.map(__helper_idx_time_reversal, zip([gqn_list]*lenl, range(lenl)))
-        P.close()
-        P.join()
-        for i in filter(lambda x: x, to_elim) :
-            gqn_list[i] = False
-        gqn_list = [gq for gq in gqn_list if gq]
+        budget.track('level', sum(gqn.nbytes() for gqn in gqn_list))
+        compact = compact or budget.near(len(gqn_list)*GraphQNet.estimate_nbytes(nedge))
+        copy_nbytes = len(gqn_list)*GraphQNet.estimate_nbytes(nedge, graph=not compact)
+        nworker = budget.workers(ncpu, copy_nbytes + GraphQNet.estimate_nbytes(nedge))
+        budget.track('dedup', nworker*copy_nbytes if nworker > 1 else GraphQNet.estimate_nbytes(nedge))
+        gqn_list = eliminate_by_idx(gqn_list, __helper_idx_time_reversal, nworker, compact=compact)
         res = {'nqubit':nqubit,
                'depth':nedge,
                'time': time()-start_time,
@@ -221,8 +486,164 @@ def graphqnet_noniso(nqubit, net_depth, outdir=False, start_gqns=False, draw_gra
 
 
 
+# Sharded iteration: one level of graphqnet_noniso is split into shard_level, which
+# expands a slice of the parents, and merge_shards, which joins the slices and applies
+# the swap conjugation (and time reversal) criteria. They only exchange files, thus
+# the shards can run on separate nodes.
+
+def shard_path(outdir, nqubit, nedge, shard_index, shard_count):
+    """ Return the path of a shard output of the level with nedge edges
+    """
+    return '%s/nonisonet-%iQ-%iE-shard%iof%i.json'%(outdir, nqubit, nedge, shard_index, shard_count)
+
+
+def shard_bounds(nnet, shard_index, shard_count):
+    """ Return (start, stop) of the shard_index-th of shard_count contiguous slices of nnet networks,
+    contiguous such that joining the shards in order keeps the serial ordering
+    """
+    size, rest = divmod(nnet, shard_count)
+    start = shard_index*size + min(shard_index, rest)
+    return start, start + size + (shard_index < rest)
+
+
+def seed_level(nqubit, outdir=False):
+    """ Write the level with one edge, the start of a sharded iteration. Return its path.
+
+    :nqubit: int, the number of qubits
+    :outdir: str='out', the directory to store outputs
+    """
+    outdir = outdir if outdir else 'out'
+    run(['mkdir','-p',outdir])
+
+    #no criteria are recorded, merge_shards records the ones it applies
+    res_path = '%s/nonisonet-%iQ-%iE.json'%(outdir,nqubit,1)
+    res = {'nqubit':nqubit,
+           'depth':1,
+           'time': 0,
+           'start_gate': 1,
+           'networks':[(bitop.pos_ones_toint(0,1),)]
+           }
+    with open(res_path, 'w+') as outf :
+        json.dump(res, outf)
+    return res_path
+
+
+def shard_level(level_file, shard_index, shard_count, outdir=False, compact=False):
+    """ Expand the shard_index-th of shard_count contiguous slices of the networks in
+    level_file by one edge, and store the non-isomorphic results. Return the shard path.
+
+    :level_file: str, a level result, e.g. 'out/nonisonet-5Q-4E.json', or the shard_index-th part of
+                 a level already split in shard_count, then all its networks are expanded
+    :shard_index: int, the shard to compute, 0 <= shard_index < shard_count
+    :shard_count: int, the number of shards of the level
+    :outdir: str='out', the directory to store outputs
+    :compact: boolean=False, release the graphs of the results to save memory
+    """
+    if not 0 <= shard_index < shard_count :
+        raise ValueError('shard_index must be within 0 and %i'%(shard_count-1))
+    outdir = outdir if outdir else 'out'
+    run(['mkdir','-p',outdir])
+    start_time = time()
+
+    with open(level_file) as inff :
+        level = json.load(inff)
+    nqubit, nedge, nets = level['nqubit'], level['depth'], level['networks']
+    start_gate = level.get('start_gate', 1)
+
+    if 'nshard' in level :
+        if (level['shard'], level['nshard']) != (shard_index, shard_count) :
+            raise ValueError('%s is the part %i of %i'%(level_file, level['shard'], level['nshard']))
+        start, stop = 0, len(nets)
+    else :
+        start, stop = shard_bounds(len(nets), shard_index, shard_count)
+
+    net_edges = list(gate_tables(nqubit).gates)
+    gqn_list = [GraphQNet(nqubit, tuple(ng)) for ng in nets[start:stop]]
+    level = nets = None
+    gqn_list = iterate_graphqnet_noniso(nqubit, gqn_list, net_edges, compact=compact)
+
+    res_path = shard_path(outdir, nqubit, nedge+1, shard_index, shard_count)
+    res = {'nqubit':nqubit,
+           'depth':nedge+1,
+           'time': time()-start_time,
+           'shard': shard_index,
+           'nshard': shard_count,
+           'start_gate': start_gate,
+           'networks':[gqn.netgates for gqn in gqn_list]
+           }
+    with open(res_path, 'w+') as outf :
+        json.dump(res, outf)
+    return res_path
+
+
+def merge_shards(level_file, shard_count, outdir=False, ncpu=False, conjugation_by_swap=True, time_reversal=False, block=False):
+    """ Join the shard outputs of level_file into the next level 'nonisonet-[nqubit]Q-[nedges]E.json',
+    applying the swap conjugation over the whole level. As in the serial iteration, the
+    isomorphism is only deduplicated among the children of one parent: children of distinct
+    parents may be isomorphic, e.g. (3,3,12,12,3) and (3,3,12,3,12), and are kept on purpose
+    such that the merged level is the serial one.
+    With time_reversal, the final result 'net-[nqubit]Q-[nedges]E.json' is written as well.
+    The shard outputs are removed afterwards. Return the list of GraphQNet of the next level.
+
+    :level_file: str, the level that has been sharded, e.g. 'out/nonisonet-5Q-4E.json'
+    :shard_count: int, the number of shards of the level
+    :outdir: str='out', the directory that stores the shard outputs
+    :ncpu: int=cpu_count(), the cpu number for parallelization
+    :conjugation_by_swap: boolean=True, consider elimination by swap conjugation
+    :time_reversal: boolean=False, consider elimination by time reversal
+    :block: int=False, eliminate from the shard files by blocks of this many networks, see
+            eliminate_on_disk, and keep the networks without graphs. By default the whole
+            level is loaded with its graphs.
+    """
+    outdir = outdir if outdir else 'out'
+    ncpu = ncpu if ncpu else cpu_count()
+    start_time = time()
+
+    with open(level_file) as inff :
+        level = json.load(inff)
+    nqubit, nedge, start_gate = level['nqubit'], level['depth']+1, level.get('start_gate', 1)
+    level = None
+
+    paths = [shard_path(outdir, nqubit, nedge, i, shard_count) for i in range(shard_count)]
+    if block :
+        elim = set()
+        if conjugation_by_swap:
+            elim = eliminate_on_disk(nqubit, paths, GraphQNet.conjugation_by_swap, block)
+        gqn_list = [GraphQNet(nqubit, net) for i, net in enumerate(read_networks(paths)) if i not in elim]
+    else :
+        gqn_list = [GraphQNet(nqubit, net) for net in read_networks(paths)]
+        if conjugation_by_swap:
+            gqn_list = eliminate_by_idx(gqn_list, __helper_idx_conjugation_by_swap, ncpu)
+
+    res = {'nqubit':nqubit,
+           'depth':nedge,
+           'time': time()-start_time,
+           'conjugation_by_swap': conjugation_by_swap,
+           'time_reversal': False,
+           'start_gate': start_gate,
+           'networks':[gqn.netgates for gqn in gqn_list]
+           }
+    with open('%s/nonisonet-%iQ-%iE.json'%(outdir,nqubit,nedge), 'w+') as outf :
+        json.dump(res, outf)
+
+    if time_reversal:
+        fin_list = eliminate_by_idx(list(gqn_list), __helper_idx_time_reversal, ncpu, compact=bool(block))
+        res.update({'time': time()-start_time,
+                    'time_reversal': time_reversal,
+                    'networks':[gqn.netgates for gqn in fin_list]})
+        with open('%s/net-%iQ-%iE.json'%(outdir,nqubit,nedge), 'w+') as outf :
+            json.dump(res, outf)
+
+    for path in paths :
+        os.remove(path)
+
+    return gqn_list
+
+
+
+
 
-def unique2net(nqubit, net_depth, startfile=False, draw_graphs=True, outpath='out', ncpu=False, conjugation_by_swap=True, time_reversal=True):
+def unique2net(nqubit, net_depth, startfile=False, draw_graphs=True, outpath='out', ncpu=False, conjugation_by_swap=True, time_reversal=True, max_memory=False):
     """
     Get a list of 2-bit gates networks. The unique gates are iterated by the following steps:
         1) iterate the non-isomorphic graph up to gate ordering
@@ -239,6 +660,7 @@ def unique2net(nqubit, net_depth, startfile=False, draw_graphs=True, outpath='ou
         :ncpu: int=cpu_count, the number of cpu in parallelization
         'conjugation_by_swap'
         :time_reversal: boolean=False, include time reversal criteria
+        :max_memory: int or str=False, the memory budget in bytes or like '4G', see graphqnet_noniso
 
     return
         [(int,int,..),(...),...] a list of 2-bit networks gates, with the LSB
@@ -259,7 +681,7 @@ def unique2net(nqubit, net_depth, startfile=False, draw_graphs=True, outpath='ou
             sdepth = sdata['depth']
             gqn_list = sdata['networks']
             snqubit = sdata['nqubit']
-            start_gqns = [GraphQNet(snqubit, x) for x in gqn_list]
+            start_gqns = [GraphQNet(snqubit, tuple(x)) for x in gqn_list]
             if sdepth >= net_depth :
                 print("nothing to do here")
                 return
@@ -268,7 +690,8 @@ def unique2net(nqubit, net_depth, startfile=False, draw_graphs=True, outpath='ou
 
     unique_net = graphqnet_noniso(nqubit, net_depth, outdir=outpath,
                                   start_gqns=start_gqns, draw_graphs=draw_graphs,
-                                  ncpu = ncpu, conjugation_by_swap=conjugation_by_swap, time_reversal=time_reversal)
+                                  ncpu = ncpu, conjugation_by_swap=conjugation_by_swap, time_reversal=time_reversal,
+                                  max_memory=max_memory)
 
     print('%i unique networks is calculated in %f seconds'%(len(unique_net),time()-start))
 
@@ -276,3 +699,119 @@ def unique2net(nqubit, net_depth, startfile=False, draw_graphs=True, outpath='ou
 
 
 
+
+def _add_run_arguments(parser):
+    """ Arguments shared by the enumerate and resume commands
+    """
+    parser.add_argument('net_depth', type=int, help='the depth of the gate-networks')
+    parser.add_argument('--outpath', default='out', help='directory path to store outputs')
+    parser.add_argument('--ncpu', type=int, default=False, help='the number of cpu in parallelization')
+    parser.add_argument('--draw', dest='draw_graphs', action='store_true', help='draw the produced graphs')
+    parser.add_argument('--no-conjugation-by-swap', dest='conjugation_by_swap', action='store_false',
+                        help='skip the conjugation by swap criteria')
+    parser.add_argument('--no-time-reversal', dest='time_reversal', action='store_false',
+                        help='skip the time reversal criteria')
+    parser.add_argument('--max-memory', default=False, help="the memory budget, e.g. '4G'")
+
+
+def _load_result(path):
+    with open(path) as inff :
+        return json.load(inff)
+
+
+def main(argv=None):
+    """ Command line entry point, run `python -m unique2net --help`
+
+    :argv: list(str)=sys.argv[1:], the command line arguments
+    """
+    parser = ArgumentParser(prog='unique2net', description='list all unique 2-bit gate networks by the criteria of DiVincenzo and Smolin')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    cmd = commands.add_parser('enumerate', help='list the unique networks from scratch')
+    cmd.add_argument('nqubit', type=int, help='the number of qubits')
+    _add_run_arguments(cmd)
+
+    cmd = commands.add_parser('resume', help='continue the iteration from a result file')
+    cmd.add_argument('startfile', help="a result file, e.g. 'out/net-5Q-4E.json'")
+    _add_run_arguments(cmd)
+
+    cmd = commands.add_parser('seed', help='write the one-edge level that starts a sharded iteration')
+    cmd.add_argument('nqubit', type=int, help='the number of qubits')
+    cmd.add_argument('--outpath', default='out', help='directory path to store outputs')
+
+    cmd = commands.add_parser('shard', help='expand one slice of a level, see shard_level')
+    cmd.add_argument('level_file', help="a level result, e.g. 'out/nonisonet-5Q-4E.json'")
+    cmd.add_argument('shard_index', type=int, help='the shard to compute, from 0')
+    cmd.add_argument('shard_count', type=int, help='the number of shards')
+    cmd.add_argument('--outpath', default='out', help='directory path to store outputs')
+
+    cmd = commands.add_parser('merge', help='join the shards of a level into the next level, see merge_shards')
+    cmd.add_argument('level_file', help='the level that has been sharded')
+    cmd.add_argument('shard_count', type=int, help='the number of shards')
+    cmd.add_argument('--outpath', default='out', help='directory path that stores the shards')
+    cmd.add_argument('--ncpu', type=int, default=False, help='the number of cpu in parallelization')
+    cmd.add_argument('--no-conjugation-by-swap', dest='conjugation_by_swap', action='store_false',
+                     help='skip the conjugation by swap criteria')
+    cmd.add_argument('--time-reversal', action='store_true',
+                     help='write the final result with the time reversal criteria as well')
+
+    cmd = commands.add_parser('count', help='print the number of networks in result files')
+    cmd.add_argument('files', nargs='+', help='the result files')
+
+    cmd = commands.add_parser('render', help='draw the networks of a result file')
+    cmd.add_argument('file', help='the result file')
+    cmd.add_argument('--outfile', default=False, help='the picture, by default the result file with .png')
+    cmd.add_argument('--nrow', type=int, default=False, help='the number of row of image tiles')
+    cmd.add_argument('--ncpu', type=int, default=False, help='the number of cpu in parallelization')
+
+    cmd = commands.add_parser('inspect', help='print the settings of a result file')
+    cmd.add_argument('file', help='the result file')
+    cmd.add_argument('--networks', action='store_true', help='print the networks as well')
+
+    args = parser.parse_args(argv)
+
+    if args.command in ('enumerate', 'resume'):
+        if args.command == 'resume':
+            nqubit, startfile = _load_result(args.startfile)['nqubit'], args.startfile
+        else :
+            nqubit, startfile = args.nqubit, False
+        unique2net(nqubit, args.net_depth, startfile=startfile, draw_graphs=args.draw_graphs,
+                   outpath=args.outpath, ncpu=args.ncpu,
+                   conjugation_by_swap=args.conjugation_by_swap, time_reversal=args.time_reversal,
+                   max_memory=args.max_memory)
+
+    elif args.command == 'seed':
+        print(seed_level(args.nqubit, outdir=args.outpath))
+
+    elif args.command == 'shard':
+        print(shard_level(args.level_file, args.shard_index, args.shard_count, outdir=args.outpath))
+
+    elif args.command == 'merge':
+        gqn_list = merge_shards(args.level_file, args.shard_count, outdir=args.outpath, ncpu=args.ncpu,
+                                conjugation_by_swap=args.conjugation_by_swap, time_reversal=args.time_reversal)
+        print('%i networks in the next level'%len(gqn_list))
+
+    elif args.command == 'count':
+        for path in args.files:
+            print('%s: %i'%(path, len(_load_result(path)['networks'])))
+
+    elif args.command == 'render':
+        res = _load_result(args.file)
+        outfile = args.outfile if args.outfile else os.path.splitext(args.file)[0]+'.png'
+        GraphQNet.draw_netgraphs_list([tuple(net) for net in res['networks']], res['nqubit'],
+                                      outfile=outfile, nrow=args.nrow, ncpu=args.ncpu)
+
+    elif args.command == 'inspect':
+        res = _load_result(args.file)
+        for key, val in res.items():
+            if key != 'networks':
+                print('%s: %s'%(key, val))
+        print('networks: %i'%len(res['networks']))
+        if args.networks :
+            for net in res['networks']:
+                print(tuple(net))
+
+
+
+if __name__ == '__main__':
+    main()